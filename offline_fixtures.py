@@ -0,0 +1,90 @@
+import os
+import zlib
+import numpy as np
+import pandas as pd
+
+# --- 設定: 環境変数から取得 (OFFLINE_FIXTURES=1 のときに使用) ---
+FIXTURE_TICKER_COUNT = int(os.environ.get("FIXTURE_TICKER_COUNT", "300"))
+
+# 決算期 (新しい順) と履歴データの基準日。毎回同じデータになるよう固定する
+_PERIODS = pd.to_datetime(["2024-03-31", "2023-03-31", "2022-03-31", "2021-03-31"])
+_END_DATE = pd.Timestamp("2024-06-28")
+_PERIOD_DAYS = {"1mo": 21, "3mo": 63, "6mo": 125, "1y": 245, "2y": 490}
+
+# ---------------------------------------------------------
+# 銘柄ごとに固定シードの乱数を作る (ネットワーク不要・再現可能)
+# ---------------------------------------------------------
+def _rng(ticker_symbol, salt=""):
+    return np.random.default_rng(zlib.crc32(f"{ticker_symbol}{salt}".encode()))
+
+def fixture_tickers(count=None):
+    count = count or FIXTURE_TICKER_COUNT
+    return [f"{1300 + i}.T" for i in range(count)]
+
+def _price_history(ticker_symbol, period):
+    days = _PERIOD_DAYS.get(period, 245)
+    rng = _rng(ticker_symbol, "history")
+    index = pd.bdate_range(end=_END_DATE, periods=days)
+    start = rng.uniform(500, 8000)
+    close = start * np.exp(np.cumsum(rng.normal(0.0005, 0.02, days)))
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.005, days)),
+        "High": close * (1 + np.abs(rng.normal(0, 0.01, days))),
+        "Low": close * (1 - np.abs(rng.normal(0, 0.01, days))),
+        "Close": close,
+        "Volume": rng.integers(10_000, 5_000_000, days),
+    }, index=index)
+
+# ---------------------------------------------------------
+# yf.Ticker の代わりに使う固定データ
+# ---------------------------------------------------------
+class FixtureTicker:
+    def __init__(self, ticker_symbol):
+        self.ticker = ticker_symbol
+        self._revenue = float(_rng(ticker_symbol).uniform(1e10, 1e12))
+
+    @property
+    def info(self):
+        rng = _rng(self.ticker, "info")
+        gross_profit = self._revenue * rng.uniform(0.2, 0.7)
+        return {
+            "shortName": f"Fixture {self.ticker}",
+            "currentPrice": round(float(rng.uniform(500, 8000)), 1),
+            "totalRevenue": self._revenue,
+            "grossProfits": gross_profit,
+            "returnOnEquity": float(rng.uniform(0.0, 0.35)),
+            "netIncomeToCommon": gross_profit * rng.uniform(0.1, 0.4),
+            "longTermDebt": self._revenue * rng.uniform(0.0, 0.5),
+            "heldPercentInsiders": float(rng.uniform(0.0, 0.4)),
+        }
+
+    @property
+    def financials(self):
+        rng = _rng(self.ticker, "financials")
+        return pd.DataFrame({
+            "Operating Income": self._revenue * rng.uniform(0.05, 0.3, len(_PERIODS)),
+            "Interest Expense": -self._revenue * rng.uniform(0.0, 0.02, len(_PERIODS)),
+        }, index=_PERIODS).T
+
+    @property
+    def balance_sheet(self):
+        rng = _rng(self.ticker, "balance_sheet")
+        shares = rng.uniform(1e7, 1e9) * np.cumprod(rng.uniform(0.97, 1.02, len(_PERIODS)))
+        return pd.DataFrame({
+            "Retained Earnings": self._revenue * np.cumprod(rng.uniform(0.9, 1.1, len(_PERIODS))),
+            "Ordinary Shares Number": shares,
+        }, index=_PERIODS).T
+
+    @property
+    def cashflow(self):
+        rng = _rng(self.ticker, "cashflow")
+        return pd.DataFrame({
+            "Capital Expenditure": -self._revenue * rng.uniform(0.01, 0.1, len(_PERIODS)),
+        }, index=_PERIODS).T
+
+    def history(self, period="1mo", **kwargs):
+        return _price_history(self.ticker, period)
+
+# yf.download の代わり
+def fixture_download(ticker_symbol, period="1mo", **kwargs):
+    return _price_history(ticker_symbol, period)
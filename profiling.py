@@ -0,0 +1,191 @@
+import os
+import sys
+import time
+import threading
+import contextlib
+import cProfile
+import pstats
+from collections import defaultdict
+
+# --- 設定: 環境変数から取得 (PROFILE=1 のときだけ有効) ---
+PROFILE_ENABLED = os.environ.get("PROFILE") == "1"
+PROFILE_STAGE = os.environ.get("PROFILE_STAGE")               # 詳細プロファイルを取るステージ名
+PROFILE_MODE = os.environ.get("PROFILE_MODE", "cprofile")     # "cprofile" または "sample"
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profile_output")
+SAMPLE_INTERVAL = float(os.environ.get("PROFILE_SAMPLE_INTERVAL", "0.005"))
+
+# 計測中のステージ名のスタックと集計結果 {ステージのパス: [呼び出し回数, 合計秒, 子ステージの合計秒]}
+_stack = []
+_stats = {}
+
+# 詳細プロファイラは1回の実行につき1つだけ作り、対象ステージの出入りで再開/一時停止する
+_detail = None
+_detail_depth = 0
+
+# ---------------------------------------------------------
+# ステージ計測 (ネスト可能なタイマー)
+# ---------------------------------------------------------
+@contextlib.contextmanager
+def timer(name):
+    if not PROFILE_ENABLED:
+        yield
+        return
+
+    start = time.perf_counter()
+    _stack.append(name)
+    path = tuple(_stack)
+    detail = False
+    try:
+        if name == PROFILE_STAGE: detail = _resume_detail()
+        yield
+    finally:
+        if detail: _pause_detail()
+        elapsed = time.perf_counter() - start
+        _stack.pop()
+
+        rec = _stats.setdefault(path, [0, 0, 0.0])
+        rec[0] += 1
+        rec[1] += elapsed
+        if _stack:
+            _stats.setdefault(tuple(_stack), [0, 0, 0.0])[2] += elapsed
+
+# ---------------------------------------------------------
+# リモート呼び出しの計測 (yf.Ticker などを包むプロキシ)
+# ---------------------------------------------------------
+class _TimedProxy:
+    def __init__(self, target, prefix):
+        self._target = target
+        self._prefix = prefix
+
+    def __getattr__(self, name):
+        label = f"{self._prefix}.{name}"
+        # info / financials などのプロパティはアクセス時に取得・パースが走る
+        if isinstance(getattr(type(self._target), name, None), property):
+            with timer(label):
+                return getattr(self._target, name)
+
+        value = getattr(self._target, name)
+        if not callable(value): return value
+
+        def timed_call(*args, **kwargs):
+            with timer(label):
+                return value(*args, **kwargs)
+        return timed_call
+
+def wrap_remote(target, prefix):
+    if not PROFILE_ENABLED: return target
+    return _TimedProxy(target, prefix)
+
+# ---------------------------------------------------------
+# 1ステージだけの詳細プロファイル (cProfile / サンプリング)
+# ---------------------------------------------------------
+class _Sampler(threading.Thread):
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = defaultdict(int)
+        self.done = threading.Event()
+        self.active = threading.Event()
+
+    def run(self):
+        while not self.done.wait(self.interval):
+            if not self.active.is_set(): continue
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name}@{os.path.basename(code.co_filename)}:{code.co_firstlineno}")
+                frame = frame.f_back
+            if frames:
+                self.counts[";".join(reversed(frames))] += 1
+
+def _resume_detail():
+    global _detail, _detail_depth
+    _detail_depth += 1
+    if _detail_depth > 1: return True  # 同名ステージの入れ子は外側で計測済み
+
+    try:
+        if PROFILE_MODE == "sample":
+            if _detail is None:
+                _detail = _Sampler(threading.get_ident(), SAMPLE_INTERVAL)
+                _detail.start()
+            _detail.active.set()
+        else:
+            if _detail is None: _detail = cProfile.Profile()
+            _detail.enable()
+    except Exception as e:
+        # python -m cProfile など他のプロファイラが有効な場合は詳細プロファイルなしで続行
+        _detail_depth -= 1
+        print(f"詳細プロファイル開始エラー: {e}")
+        return False
+    return True
+
+def _pause_detail():
+    global _detail_depth
+    _detail_depth -= 1
+    if _detail_depth > 0: return
+
+    if isinstance(_detail, _Sampler): _detail.active.clear()
+    else: _detail.disable()
+
+def _write_detail():
+    if _detail is None: return None
+    base = os.path.join(PROFILE_DIR, _file_label(PROFILE_STAGE))
+
+    if isinstance(_detail, _Sampler):
+        _detail.done.set()
+        _detail.join()
+        filename = f"{base}.sampled.collapsed"
+        with open(filename, "w", encoding="utf-8") as f:
+            for stack, count in sorted(_detail.counts.items()):
+                f.write(f"{stack} {count}\n")
+    else:
+        _detail.disable()
+        _detail.dump_stats(f"{base}.prof")
+        filename = f"{base}.pstats.txt"
+        with open(filename, "w", encoding="utf-8") as f:
+            pstats.Stats(_detail, stream=f).sort_stats("cumulative").print_stats(40)
+    return filename
+
+def _file_label(name):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in name)
+
+# ---------------------------------------------------------
+# レポート出力 (ステージ別内訳 + フレームグラフ用 collapsed stack)
+# ---------------------------------------------------------
+def write_report():
+    if not PROFILE_ENABLED or not _stats: return None
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    run_total = sum(rec[1] for path, rec in _stats.items() if len(path) == 1) or 1e-9
+    rows = []
+    for path, (calls, total, child) in sorted(_stats.items()):
+        self_time = max(total - child, 0.0)
+        rows.append((path, calls, total, self_time))
+
+    lines = [f"{'stage':<48} {'calls':>7} {'total[s]':>10} {'self[s]':>10} {'avg[ms]':>10} {'share':>7}"]
+    for path, calls, total, self_time in rows:
+        label = "  " * (len(path) - 1) + path[-1]
+        avg_ms = total / calls * 1000 if calls else 0
+        lines.append(f"{label:<48} {calls:>7} {total:>10.3f} {self_time:>10.3f} {avg_ms:>10.1f} {total / run_total:>6.1%}")
+    breakdown = "\n".join(lines)
+
+    breakdown_file = os.path.join(PROFILE_DIR, "stage_breakdown.txt")
+    with open(breakdown_file, "w", encoding="utf-8") as f:
+        f.write(breakdown + "\n")
+
+    # flamegraph.pl / speedscope 用: 自己時間 (マイクロ秒) を重みにする
+    collapsed_file = os.path.join(PROFILE_DIR, "stages.collapsed")
+    with open(collapsed_file, "w", encoding="utf-8") as f:
+        for path, calls, total, self_time in rows:
+            weight = int(self_time * 1_000_000)
+            if weight > 0:
+                f.write(";".join(p.replace(" ", "_") for p in path) + f" {weight}\n")
+
+    print("\n=== プロファイル結果 ===")
+    print(breakdown)
+    print(f"保存先: {breakdown_file}, {collapsed_file}")
+    detail_file = _write_detail()
+    if detail_file: print(f"詳細プロファイル: {detail_file}")
+    return breakdown_file
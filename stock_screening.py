@@ -11,20 +11,46 @@ import time
 from tqdm import tqdm
 import matplotlib.pyplot as plt
 import japanize_matplotlib
+import profiling
 
 # --- 設定: 環境変数から取得 ---
 GMAIL_USER = os.environ.get("GMAIL_USER")
 GMAIL_PASSWORD = os.environ.get("GMAIL_PASSWORD")
 TO_EMAIL = GMAIL_USER 
+OFFLINE = os.environ.get("OFFLINE_FIXTURES") == "1"  # 固定データで実行 (ネットワーク・メールなし)
+
+if OFFLINE:
+    import offline_fixtures
+
+# ---------------------------------------------------------
+# データ取得の入口 (オフライン切替 & プロファイル計測)
+# ---------------------------------------------------------
+def get_ticker(ticker_symbol):
+    stock = offline_fixtures.FixtureTicker(ticker_symbol) if OFFLINE else yf.Ticker(ticker_symbol)
+    return profiling.wrap_remote(stock, "yf.Ticker")
+
+def download_prices(ticker_symbol, **kwargs):
+    with profiling.timer("yf.download"):
+        if OFFLINE: return offline_fixtures.fixture_download(ticker_symbol, **kwargs)
+        return yf.download(ticker_symbol, **kwargs)
+
+def wait(seconds):
+    # API制限対策の待機 (オフライン時は不要)。内訳で実処理と区別できるよう別に計測
+    if OFFLINE: return
+    with profiling.timer("sleep"):
+        time.sleep(seconds)
 
 # ---------------------------------------------------------
 # 関数1: 全銘柄リスト取得
 # ---------------------------------------------------------
 def get_all_jpx_tickers():
+    if OFFLINE: return offline_fixtures.fixture_tickers()
+
     print("JPX公式サイトから銘柄一覧を取得中...")
     url = "https://www.jpx.co.jp/markets/statistics-equities/misc/tvdivq0000001vg2-att/data_j.xls"
     try:
-        df_list = pd.read_excel(url)
+        with profiling.timer("jpx.read_excel"):
+            df_list = pd.read_excel(url)
         tickers = df_list["コード"].astype(str) + ".T"
         print(f"取得完了: {len(tickers)} 銘柄が見つかりました。")
         return tickers.tolist()
@@ -37,7 +63,7 @@ def get_all_jpx_tickers():
 # ---------------------------------------------------------
 def check_basic_criteria(ticker_symbol):
     try:
-        stock = yf.Ticker(ticker_symbol)
+        stock = get_ticker(ticker_symbol)
         info = stock.info
         
         if 'totalRevenue' not in info or 'grossProfits' not in info: return None
@@ -69,7 +95,7 @@ def check_basic_criteria(ticker_symbol):
 def get_deep_analysis(ticker_data):
     ticker = ticker_data["Ticker"]
     try:
-        stock = yf.Ticker(ticker)
+        stock = get_ticker(ticker)
         info = stock.info
         income = stock.financials
         balance = stock.balance_sheet
@@ -132,7 +158,7 @@ def get_deep_analysis(ticker_data):
 def get_ultimate_data(base_data):
     ticker = base_data["Ticker"]
     try:
-        stock = yf.Ticker(ticker)
+        stock = get_ticker(ticker)
         info = stock.info
         
         insider_pct = info.get('heldPercentInsiders', 0) * 100
@@ -148,20 +174,21 @@ def get_ultimate_data(base_data):
         hist = stock.history(period="6mo")
         if len(hist) < 75: return None
         
-        close = hist['Close']
-        ma5 = close.rolling(5).mean().iloc[-1]
-        ma25 = close.rolling(25).mean().iloc[-1]
-        ma75 = close.rolling(75).mean().iloc[-1]
-        
-        trend = "レンジ/下降"
-        if close.iloc[-1] > ma25 and ma25 > ma75: trend = "上昇"
-        if ma5 > ma25 and ma25 > ma75: trend = "★パーフェクト"
-
-        delta = close.diff()
-        gain = delta.where(delta > 0, 0).rolling(14).mean().iloc[-1]
-        loss = -delta.where(delta < 0, 0).rolling(14).mean().iloc[-1]
-        rs = gain / loss if loss != 0 else 0
-        rsi = 100 - (100 / (1 + rs))
+        with profiling.timer("pandas.indicators"):
+            close = hist['Close']
+            ma5 = close.rolling(5).mean().iloc[-1]
+            ma25 = close.rolling(25).mean().iloc[-1]
+            ma75 = close.rolling(75).mean().iloc[-1]
+            
+            trend = "レンジ/下降"
+            if close.iloc[-1] > ma25 and ma25 > ma75: trend = "上昇"
+            if ma5 > ma25 and ma25 > ma75: trend = "★パーフェクト"
+
+            delta = close.diff()
+            gain = delta.where(delta > 0, 0).rolling(14).mean().iloc[-1]
+            loss = -delta.where(delta < 0, 0).rolling(14).mean().iloc[-1]
+            rs = gain / loss if loss != 0 else 0
+            rsi = 100 - (100 / (1 + rs))
 
         return {
             "社名": base_data["Name"],
@@ -192,7 +219,8 @@ def generate_charts(results_list, filename="chart_summary.png"):
     rows = math.ceil(num_plots / cols)
     
     # グラフサイズ設定
-    fig, axes = plt.subplots(rows, cols, figsize=(20, 5 * rows))
+    with profiling.timer("matplotlib.subplots"):
+        fig, axes = plt.subplots(rows, cols, figsize=(20, 5 * rows))
     # 1行の場合や1つだけの場合のaxesの型を統一
     if num_plots == 1: axes = [axes]
     else: axes = axes.flatten()
@@ -200,7 +228,7 @@ def generate_charts(results_list, filename="chart_summary.png"):
     for i, code in enumerate(codes):
         try:
             # データ取得 (1年分)
-            df = yf.download(code, period="1y", progress=False)
+            df = download_prices(code, period="1y", progress=False)
             ax = axes[i]
 
             if len(df) == 0:
@@ -208,21 +236,23 @@ def generate_charts(results_list, filename="chart_summary.png"):
                 continue
 
             # 移動平均線
-            df['MA5'] = df['Close'].rolling(window=5).mean()
-            df['MA25'] = df['Close'].rolling(window=25).mean()
-            df['MA75'] = df['Close'].rolling(window=75).mean()
+            with profiling.timer("pandas.rolling"):
+                df['MA5'] = df['Close'].rolling(window=5).mean()
+                df['MA25'] = df['Close'].rolling(window=25).mean()
+                df['MA75'] = df['Close'].rolling(window=75).mean()
 
             # プロット
-            ax.plot(df.index, df['Close'], label='株価', color='#333333', linewidth=1.5, alpha=0.7)
-            ax.plot(df.index, df['MA5'], label='5日', color='#ff7f0e', linewidth=1.5)
-            ax.plot(df.index, df['MA25'], label='25日', color='#1f77b4', linewidth=1.5)
-            ax.plot(df.index, df['MA75'], label='75日', color='#2ca02c', linewidth=1.5, linestyle='--')
-
-            # タイトルと装飾
-            stock_name = next((item["社名"] for item in results_list if item["コード"] == code), code)
-            ax.set_title(f"{stock_name} ({code})", fontsize=14, fontweight='bold')
-            ax.grid(True, alpha=0.3)
-            ax.legend(loc='upper left', fontsize='small')
+            with profiling.timer("matplotlib.plot"):
+                ax.plot(df.index, df['Close'], label='株価', color='#333333', linewidth=1.5, alpha=0.7)
+                ax.plot(df.index, df['MA5'], label='5日', color='#ff7f0e', linewidth=1.5)
+                ax.plot(df.index, df['MA25'], label='25日', color='#1f77b4', linewidth=1.5)
+                ax.plot(df.index, df['MA75'], label='75日', color='#2ca02c', linewidth=1.5, linestyle='--')
+
+                # タイトルと装飾
+                stock_name = next((item["社名"] for item in results_list if item["コード"] == code), code)
+                ax.set_title(f"{stock_name} ({code})", fontsize=14, fontweight='bold')
+                ax.grid(True, alpha=0.3)
+                ax.legend(loc='upper left', fontsize='small')
         
         except Exception as e:
             print(f"Plot Error {code}: {e}")
@@ -232,9 +262,10 @@ def generate_charts(results_list, filename="chart_summary.png"):
         for j in range(num_plots, len(axes)):
             fig.delaxes(axes[j])
 
-    plt.tight_layout()
-    plt.savefig(filename) # 画像として保存
-    plt.close() # メモリ開放
+    with profiling.timer("matplotlib.savefig"):
+        plt.tight_layout()
+        plt.savefig(filename) # 画像として保存
+        plt.close() # メモリ開放
     print(f"チャート画像を保存しました: {filename}")
     return filename
 
@@ -242,6 +273,9 @@ def generate_charts(results_list, filename="chart_summary.png"):
 # メール送信関数 (画像添付対応版)
 # ---------------------------------------------------------
 def send_email_with_image(subject, body, image_path=None):
+    if OFFLINE:
+        print("オフライン実行: 送信スキップ")
+        return
     if not GMAIL_USER or not GMAIL_PASSWORD:
         print("メール設定なし: 送信スキップ")
         return
@@ -277,11 +311,12 @@ def send_email_with_image(subject, body, image_path=None):
 # ---------------------------------------------------------
 # メイン処理
 # ---------------------------------------------------------
-if __name__ == "__main__":
+def run_screening():
     print("=== 全銘柄スクリーニング開始 ===")
     
     # 1. 全銘柄リスト取得
-    all_tickers = get_all_jpx_tickers()
+    with profiling.timer("step0_tickers"):
+        all_tickers = get_all_jpx_tickers()
     
     # ★テスト用 (最初は数を絞って試すならコメントアウトを外す)
     # all_tickers = all_tickers[:50]
@@ -289,24 +324,26 @@ if __name__ == "__main__":
     # 2. 一次スクリーニング
     print(f"\nStep 1: 財務基準 (粗利40%, ROE15%) で絞り込み中...")
     first_pass = []
-    for t in tqdm(all_tickers):
-        res = check_basic_criteria(t)
-        if res: first_pass.append(res)
-        time.sleep(0.05)
+    with profiling.timer("step1_basic"):
+        for t in tqdm(all_tickers):
+            res = check_basic_criteria(t)
+            if res: first_pass.append(res)
+            wait(0.05)
     
     print(f"→ 一次通過: {len(first_pass)} 銘柄")
 
     if not first_pass:
         send_email_with_image("【株分析】該当なし", "本日の基準を満たす銘柄はありませんでした。")
-        exit()
+        return
 
     # 3. 詳細スコアリング
     print(f"\nStep 2: バフェット・スコア算出中...")
     second_pass = []
-    for data in tqdm(first_pass):
-        res = get_deep_analysis(data)
-        if res: second_pass.append(res)
-        time.sleep(0.1)
+    with profiling.timer("step2_deep"):
+        for data in tqdm(first_pass):
+            res = get_deep_analysis(data)
+            if res: second_pass.append(res)
+            wait(0.1)
 
     # 上位15社に絞る (チャートが見づらくなるため)
     df_scores = pd.DataFrame(second_pass)
@@ -316,29 +353,41 @@ if __name__ == "__main__":
     # 4. 最終分析
     print(f"\nStep 3: 上位{len(top_candidates)}銘柄の最終チェック...")
     final_results = []
-    for data in tqdm(top_candidates):
-        res = get_ultimate_data(data)
-        if res: final_results.append(res)
+    with profiling.timer("step3_ultimate"):
+        for data in tqdm(top_candidates):
+            res = get_ultimate_data(data)
+            if res: final_results.append(res)
     
     # 5. チャート生成とメール送信
     if final_results:
         # チャート作成
-        chart_file = generate_charts(final_results)
-
-        df_final = pd.DataFrame(final_results)
-        table_str = df_final.to_markdown(index=False)
-        
-        mail_body = (
-            f"おはようございます。本日のスクリーニング結果です。\n\n"
-            f"【バフェット流 有望銘柄ピックアップ】\n"
-            f"{table_str}\n\n"
-            f"▼ 添付ファイルに日足チャート画像をつけました。\n"
-            f"移動平均線: 5日(橙), 25日(青), 75日(緑)\n\n"
-            f"※GitHub Actionsから自動送信"
-        )
-        
-        print("\n=== 最終結果 ===")
-        print(table_str)
-        send_email_with_image(f"【厳選】本日の有望株レポート ({len(final_results)}銘柄)", mail_body, chart_file)
+        with profiling.timer("step4_charts"):
+            chart_file = generate_charts(final_results)
+
+        with profiling.timer("step5_report"):
+            df_final = pd.DataFrame(final_results)
+            with profiling.timer("to_markdown"):
+                table_str = df_final.to_markdown(index=False)
+            
+            mail_body = (
+                f"おはようございます。本日のスクリーニング結果です。\n\n"
+                f"【バフェット流 有望銘柄ピックアップ】\n"
+                f"{table_str}\n\n"
+                f"▼ 添付ファイルに日足チャート画像をつけました。\n"
+                f"移動平均線: 5日(橙), 25日(青), 75日(緑)\n\n"
+                f"※GitHub Actionsから自動送信"
+            )
+            
+            print("\n=== 最終結果 ===")
+            print(table_str)
+            send_email_with_image(f"【厳選】本日の有望株レポート ({len(final_results)}銘柄)", mail_body, chart_file)
     else:
         print("詳細分析の結果、残った銘柄はありませんでした。")
+
+if __name__ == "__main__":
+    # PROFILE=1 のときだけ計測し、終了時にステージ別の内訳を出力
+    try:
+        with profiling.timer("screening"):
+            run_screening()
+    finally:
+        profiling.write_report()